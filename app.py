@@ -1,9 +1,11 @@
 ﻿from flask import Flask, Response, jsonify, request, render_template_string
 import google.generativeai as genai
-import cv2, threading, time, base64, os, numpy as np
+import cv2, time, base64, os
 from config import *
 from camera import CameraStream
-from inference import TFLiteEquipmentClassifier
+from framebus import FrameBusReader
+from monitor import FaultMonitor, load_classifier, load_prefilter, start_sensors
+from sensors import latest
 
 app = Flask(__name__)
 # Cloud Deployment: Use Environment Variable for Port
@@ -12,42 +14,20 @@ PORT = int(os.environ.get('PORT', APP_PORT))
 genai.configure(api_key=GEMINI_API_KEY)
 model = genai.GenerativeModel('gemini-2.5-flash')
 
-# STATE
-state = {
-    'pred': {'label': 'INITIALIZING', 'conf': 0, 'is_fault': False},
-    'cap': None,
-    'hysteresis_end': 0
-}
-state_lock = threading.Lock()
-
-# Initialize Robust Camera
-camera = CameraStream(src=0).start()
-try:
-    classifier = TFLiteEquipmentClassifier(TFLITE_MODEL_PATH, LABELS_PATH)
-except:
-    class Dummy:
-        def predict(self, f): return "NORMAL", {"normal": 1.0}
-    classifier = Dummy()
-
-def ai_loop():
-    while True:
-        frame = camera.read()
-        if frame is not None and not np.all(frame == 0):
-            label, probs = classifier.predict(frame)
-            with state_lock:
-                now = time.time()
-                conf = round(probs.get(label, 0)*100, 1)
-                is_fault = label.lower() != 'normal'
-                if is_f := is_fault:
-                    state['hysteresis_end'] = now + 4.0
-                    state['pred'] = {'label': label.upper(), 'conf': conf, 'is_fault': True}
-                    _, buf = cv2.imencode('.jpg', frame)
-                    state['cap'] = base64.b64encode(buf).decode('utf-8')
-                elif now >= state['hysteresis_end']:
-                    state['pred'] = {'label': 'NORMAL', 'conf': round(probs.get('normal',0)*100, 1), 'is_fault': False}
-        time.sleep(0.2)
-
-threading.Thread(target=ai_loop, daemon=True).start()
+# Either read from a dedicated capture_service.py over shared memory (multi-worker),
+# or own the camera and the inference loop in this process (single worker).
+USE_FRAME_BUS = os.environ.get('FRAME_BUS') == '1'
+if USE_FRAME_BUS:
+    camera = FrameBusReader(FRAME_BUS_NAME, CAMERA_RESOLUTION, stale_sec=FRAME_BUS_STALE_SEC)
+    monitor = None
+else:
+    # Initialize Robust Camera
+    camera = CameraStream(src=0).start()
+    monitor = FaultMonitor(camera, load_classifier(), sensors=start_sensors(), prefilter=load_prefilter()).start()
+
+def snapshot():
+    if monitor: return monitor.snapshot()
+    return camera.read_state() or {'pred': {'label': 'INITIALIZING', 'conf': 0, 'is_fault': False}, 'cap': None, 'hysteresis_end': 0}
 
 STYLE = """
 <style>
@@ -187,12 +167,16 @@ def pred_page():
 
 @app.route('/api/sync')
 def sync():
-    with state_lock: return jsonify(state)
+    return jsonify(snapshot())
+
+@app.route('/api/sensors')
+def sensors_api():
+    return jsonify(snapshot().get('sensors') or {})
 
 @app.route('/api/fix-solution', methods=['POST'])
 def fix_api():
-    with state_lock:
-        defect, img_data = state['pred']['label'], state['cap']
+    state = snapshot()
+    defect, img_data = state['pred']['label'], state['cap']
     if not img_data:
         frame = camera.read()
         if frame is not None:
@@ -205,12 +189,18 @@ def fix_api():
 
 @app.route('/api/predictive-solution', methods=['POST'])
 def pred_api():
-    d = request.json
+    d = request.json or {}
+    # Fall back to live ESP readings for anything the user left blank
+    readings = snapshot().get('sensors')
+    for key in ('temperature', 'load'):
+        if d.get(key) in (None, ''):
+            d[key] = latest(readings, key, SENSOR_MAX_AGE_SEC)
+    unit = lambda v, u: 'unknown' if v in (None, '') else f"{v}{u}"
     try:
         prompt = f"""
         Predict equipment maintenance based on:
-        - Current Temperature: {d.get('temperature')}°C
-        - Current Load: {d.get('load')}%
+        - Current Temperature: {unit(d.get('temperature'), '°C')}
+        - Current Load: {unit(d.get('load'), '%')}
         - Last Service Date: {d.get('last_service')}
         - Purchase Date: {d.get('purchase_date')}
         - Daily Work Hours: {d.get('work_hours')}
@@ -232,11 +222,18 @@ def chat_api():
 @app.route('/stream')
 def stream():
     def g():
+        last = None
         while True:
-            f = camera.read()
-            if f is not None:
-                _, b = cv2.imencode('.jpg', cv2.resize(f, (800, 600)))
-                yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + b.tobytes() + b'\r\n')
+            if USE_FRAME_BUS:
+                # Already encoded by the capture process; only forward new frames
+                if camera.generation != last:
+                    last, b = camera.read_jpeg()
+                    if b: yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + b + b'\r\n')
+            else:
+                f = camera.read()
+                if f is not None:
+                    _, b = cv2.imencode('.jpg', cv2.resize(f, STREAM_RESOLUTION))
+                    yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + b.tobytes() + b'\r\n')
             time.sleep(0.04)
     return Response(g(), mimetype='multipart/x-mixed-replace; boundary=frame')
 
@@ -0,0 +1,44 @@
+# Dedicated capture + inference process for multi-worker deployments.
+#
+# Owns the only camera reader and the only copy of the TFLite model, and
+# publishes the latest raw frame, stream JPEG and prediction state on the
+# shared-memory frame bus. Web workers started with FRAME_BUS=1 only read it:
+#
+#   python capture_service.py &
+#   FRAME_BUS=1 gunicorn -w 4 app:app
+import cv2, time
+from config import *
+from camera import CameraStream
+from framebus import FrameBus
+from monitor import FaultMonitor, load_classifier, load_prefilter, start_sensors
+
+def main():
+    bus = FrameBus.create(FRAME_BUS_NAME, CAMERA_RESOLUTION, FRAME_BUS_JPEG_MAX, FRAME_BUS_STATE_MAX, FRAME_BUS_STALE_SEC)
+    camera = CameraStream(src=0, resolution=CAMERA_RESOLUTION, fps=CAMERA_FPS).start()
+    monitor = FaultMonitor(camera, load_classifier(), on_update=bus.publish_state, sensors=start_sensors(), prefilter=load_prefilter())
+    bus.publish_state(monitor.snapshot())
+    monitor.start()
+    print(f"🛰️ Frame bus '{FRAME_BUS_NAME}' online", flush=True)
+
+    last, last_beat = None, time.time()
+    try:
+        while True:
+            frame = camera.frame
+            if frame is not None and frame is not last:
+                last = frame
+                _, jpg = cv2.imencode('.jpg', cv2.resize(frame, STREAM_RESOLUTION))
+                bus.publish_video(frame, jpg)
+            # Heartbeat: keep the bus fresh (and sensor readings current) even
+            # when the camera stalls and the monitor has nothing to publish
+            if time.time() - last_beat >= FRAME_BUS_STALE_SEC / 2:
+                last_beat = time.time()
+                bus.publish_state(monitor.snapshot())
+            time.sleep(1 / (2 * CAMERA_FPS))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        camera.stop()
+        bus.close()
+
+if __name__ == '__main__':
+    main()
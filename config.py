@@ -10,11 +10,45 @@ LABELS_PATH = f"{MODEL_DIR}/labels.txt"
 MODEL_INPUT_SIZE = (224, 224)
 PREDICTION_SMOOTHING = 5
 PREDICTION_THRESHOLD = 0.65
-INFERENCE_FPS = 4
+INFERENCE_FPS = 4          # ceiling for the adaptive rate controller (ratecontrol.py)
+INFERENCE_MIN_FPS = 0.5    # floor while the system is confidently normal
+RATE_RISE_THRESHOLD = 0.15 # defect probability that ramps the rate up
+RATE_MAX_CPU_TEMP = 75.0   # °C; above this the ceiling is halved
+RATE_MAX_LOAD = 0.85       # CPU busy fraction (all cores, minus the CNN); above this the ceiling is halved
+
+# === Heat-tint Pre-filter (optional) ===
+# Cheap colour check on every tick (see prefilter.py). A flag raises the CNN
+# rate to the controller's ceiling; it never bypasses it. Average CPU only drops
+# if INFERENCE_MIN_FPS is lowered too (see python prefilter.py --replay).
+# Recalibrate with: python prefilter.py --data dataset
+PREFILTER_ENABLED = False
+# 0.23 is only 0.03 above the highest non-overheating score in dataset/ and
+# flags 2 of the 3 overheating images (leave-one-out: 1/25 false positives).
+# Treat it as a starting point, not a measured false-positive rate.
+PREFILTER_THRESHOLD = 0.23
+PREFILTER_FPS = 10
 
 # === Camera ===
 CAMERA_FPS = 24
 CAMERA_RESOLUTION = (640, 480)
+STREAM_RESOLUTION = (800, 600)
+
+# === Frame Bus (multi-worker) ===
+# capture_service.py publishes frames + predictions here; app.py reads them when FRAME_BUS=1
+FRAME_BUS_NAME = "equipment_guard_bus"
+FRAME_BUS_JPEG_MAX = 1 << 20
+FRAME_BUS_STATE_MAX = 1 << 20
+FRAME_BUS_STALE_SEC = 5.0  # readers re-attach, and a new capture process may take over, after this
+
+# === ESP Sensors ===
+# name -> base URL of an ESP8266 serving GET /status (see esp_endpoints_example.ino),
+# e.g. {"motor1": "http://192.168.1.50"}. Empty disables the sensor collector.
+ESP_DEVICES = {}
+SENSOR_POLL_SEC = 2.0
+SENSOR_TIMEOUT_SEC = 1.5
+SENSOR_JITTER = 0.2
+SENSOR_BACKOFF_MAX_SEC = 30.0
+SENSOR_MAX_AGE_SEC = 30.0
 
 # === UI ===
 APP_HOST = "0.0.0.0"
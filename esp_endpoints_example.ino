@@ -1,11 +1,12 @@
 /*
  Example ESP8266 endpoints for Plant Guard
- - GET /status -> {"water_level":0-100, "pump1_count":int, "pump2_count":int}
+ - GET /status -> {"water_level":0-100, "pump1_count":int, "pump2_count":int, "temperature":float}
  - GET /spray?pump=1|2 -> triggers pump 1 or 2
 
  Adjust pins and logic to your hardware. This example assumes:
   - Pump1 on D6 (12V), Pump2 on D0 (6V)
   - Water level sensor on D5 (LOW means water present) and a simple mapping to percentage.
+  - LM35 temperature sensor on A0 (10 mV/°C).
 */
 
 #include <ESP8266WiFi.h>
@@ -32,6 +33,11 @@ int water_level_percent() {
   return present ? 100 : 0;
 }
 
+float temperature_c() {
+  // LM35: 10 mV per degree, ADC is 0-1023 over 0-3.3V
+  return analogRead(A0) * 3.3f / 1023.0f * 100.0f;
+}
+
 void do_spray(uint8_t pump) {
   if (pump == 1) {
     digitalWrite(PUMP_12V, HIGH);
@@ -47,9 +53,11 @@ void do_spray(uint8_t pump) {
 }
 
 void handle_status() {
-  char buf[128];
-  snprintf(buf, sizeof(buf), "{\"water_level\":%d,\"pump1_count\":%lu,\"pump2_count\":%lu}",
-           water_level_percent(), pump1_count, pump2_count);
+  // Add "load":0-100 here once your hardware measures it; don't report a
+  // placeholder, the Pi uses the value for maintenance predictions.
+  char buf[160];
+  snprintf(buf, sizeof(buf), "{\"water_level\":%d,\"pump1_count\":%lu,\"pump2_count\":%lu,\"temperature\":%.1f}",
+           water_level_percent(), pump1_count, pump2_count, temperature_c());
   server.send(200, "application/json", buf);
 }
 
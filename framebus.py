@@ -0,0 +1,219 @@
+import json, struct, sys, threading, time, cv2, numpy as np
+from contextlib import contextmanager
+from multiprocessing import shared_memory, resource_tracker
+
+# Shared-memory frame bus: one capture/inference process publishes, any number of
+# web workers read. Each slot is guarded by a seqlock: the writer bumps the
+# sequence to an odd value, writes the payload, then bumps it to even again.
+# Readers copy the payload and retry if the sequence was odd or moved meanwhile.
+#
+# Layout (little endian):
+#   [0:64)   header  magic, version, width, height, jpeg_max, state_max
+#   video    seq u64 | jpeg_len u32 | pad u32 | ts f64 | frame (h*w*3) | jpeg (jpeg_max)
+#   state    seq u64 | json_len u32 | pad u32 | ts f64 | json (state_max)
+
+MAGIC, VERSION = b'EGFB', 1
+_HEADER = struct.Struct('<4sIIIII')
+_SLOT = struct.Struct('<QIId')
+_HEADER_SIZE = 64
+_created = set()  # names created by this process; their tracker entry must stay
+
+
+class FrameBus:
+    def __init__(self, shm, owner):
+        self.shm, self.owner = shm, owner
+        magic, version, self.w, self.h, self.jpeg_max, self.state_max = _HEADER.unpack_from(shm.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{shm.name} is not a v{VERSION} frame bus")
+        self.video_off = _HEADER_SIZE
+        self.frame_off = self.video_off + _SLOT.size
+        self.jpeg_off = self.frame_off + self.w * self.h * 3
+        self.state_off = self.jpeg_off + self.jpeg_max
+        self.json_off = self.state_off + _SLOT.size
+        self._frame = np.ndarray((self.h, self.w, 3), dtype=np.uint8, buffer=shm.buf, offset=self.frame_off)
+        self._write_lock = threading.Lock()  # the seqlock needs a single writer per slot
+
+    @staticmethod
+    def size(resolution, jpeg_max, state_max):
+        return _HEADER_SIZE + 2 * _SLOT.size + resolution[0] * resolution[1] * 3 + jpeg_max + state_max
+
+    @classmethod
+    def create(cls, name, resolution=(640, 480), jpeg_max=1 << 20, state_max=1 << 20, stale_sec=5.0):
+        size = cls.size(resolution, jpeg_max, state_max)
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Only reclaim a block left behind by a capture process that did not
+            # shut down cleanly; a live publisher keeps ownership of the name.
+            # A block without a valid header may belong to a creator that has
+            # not written it yet, so that is refused too.
+            try:
+                other = cls.attach(name)
+            except ValueError:
+                raise RuntimeError(f"frame bus '{name}' exists but has no valid header; if no "
+                                   f"capture process is running, remove /dev/shm/{name}")
+            age = time.time() - other.last_update
+            other.close()
+            if age < stale_sec:
+                raise RuntimeError(f"frame bus '{name}' is in use by another capture process "
+                                   f"(last publish {age:.1f}s ago)")
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close(); stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        # A new block is zero-filled. Stamp both slots before the header becomes
+        # valid, so a concurrent create() sees a fresh bus rather than a stale one.
+        video_off = _HEADER_SIZE
+        state_off = video_off + _SLOT.size + resolution[0] * resolution[1] * 3 + jpeg_max
+        for off in (video_off, state_off):
+            _SLOT.pack_into(shm.buf, off, 0, 0, 0, time.time())
+        _HEADER.pack_into(shm.buf, 0, MAGIC, VERSION, resolution[0], resolution[1], jpeg_max, state_max)
+        _created.add(shm._name)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            shm = shared_memory.SharedMemory(name=name)
+            # Readers must not unlink the block when they exit (bpo-39959)
+            if shm._name not in _created:
+                resource_tracker.unregister(shm._name, 'shared_memory')
+        return cls(shm, owner=False)
+
+    # --- seqlock primitives ---
+    def _seq(self, off):
+        return struct.unpack_from('<Q', self.shm.buf, off)[0]
+
+    def _begin(self, off):
+        seq = self._seq(off) + 1
+        struct.pack_into('<Q', self.shm.buf, off, seq)
+        return seq
+
+    def _end(self, off, seq, length):
+        struct.pack_into('<IId', self.shm.buf, off + 8, length, 0, time.time())
+        struct.pack_into('<Q', self.shm.buf, off, seq + 1)
+
+    def _read(self, off, copy, retries=100):
+        for _ in range(retries):
+            seq = self._seq(off)
+            if seq & 1:
+                time.sleep(0)
+                continue
+            _, length, _, ts = _SLOT.unpack_from(self.shm.buf, off)
+            data = copy(length)
+            if self._seq(off) == seq:
+                return seq, ts, data
+        return None
+
+    # --- writer side ---
+    def publish_video(self, frame, jpeg):
+        if frame.shape != self._frame.shape:
+            frame = cv2.resize(frame, (self.w, self.h))
+        jpeg = memoryview(jpeg).cast('B')
+        if len(jpeg) > self.jpeg_max: return
+        with self._write_lock:
+            seq = self._begin(self.video_off)
+            self._frame[...] = frame
+            self.shm.buf[self.jpeg_off:self.jpeg_off + len(jpeg)] = jpeg
+            self._end(self.video_off, seq, len(jpeg))
+
+    def publish_state(self, state):
+        data = json.dumps(state).encode('utf-8')
+        if len(data) > self.state_max: return
+        with self._write_lock:
+            seq = self._begin(self.state_off)
+            self.shm.buf[self.json_off:self.json_off + len(data)] = data
+            self._end(self.state_off, seq, len(data))
+
+    # --- reader side ---
+    @property
+    def generation(self):
+        """Video sequence number; changes whenever a new frame is published."""
+        return self._seq(self.video_off)
+
+    @property
+    def last_update(self):
+        """Wall-clock time of the most recent publish on either slot."""
+        return max(_SLOT.unpack_from(self.shm.buf, self.video_off)[3],
+                   _SLOT.unpack_from(self.shm.buf, self.state_off)[3])
+
+    def read(self):
+        r = self._read(self.video_off, lambda n: self._frame.copy())
+        return r[2] if r and r[0] else np.zeros((self.h, self.w, 3), dtype=np.uint8)
+
+    def read_jpeg(self):
+        r = self._read(self.video_off, lambda n: bytes(self.shm.buf[self.jpeg_off:self.jpeg_off + n]))
+        return (r[0], r[2]) if r and r[0] else (0, None)
+
+    def read_state(self):
+        r = self._read(self.state_off, lambda n: bytes(self.shm.buf[self.json_off:self.json_off + n]))
+        return json.loads(r[2]) if r and r[0] else None
+
+    def close(self):
+        self._frame = None
+        self.shm.close()
+        if self.owner: self.shm.unlink()
+
+
+class FrameBusReader:
+    """CameraStream-compatible view of a FrameBus. Attaches lazily so web workers
+    can start before the capture process, and re-attaches when the publisher goes
+    quiet (e.g. it was restarted and recreated the block).
+
+    Safe to share between request threads: a bus that goes stale is swapped out
+    under a lock and only closed once the reads still using it have finished."""
+    def __init__(self, name, resolution=(640, 480), retry_sec=1.0, stale_sec=5.0):
+        self.name, self.resolution = name, resolution
+        self.retry_sec, self.stale_sec = retry_sec, stale_sec
+        self.bus, self._next_try = None, 0
+        self.lock = threading.Lock()
+
+    def _refresh(self):
+        now = time.time()
+        if now < self._next_try: return
+        self._next_try = now + self.retry_sec
+        if self.bus is not None and now - self.bus.last_update > self.stale_sec:
+            self._retire(self.bus)
+            self.bus = None
+        if self.bus is None:
+            try:
+                self.bus = FrameBus.attach(self.name)
+                self.bus.users, self.bus.retired = 0, False
+            except (FileNotFoundError, ValueError): pass
+
+    def _retire(self, bus):
+        bus.retired = True
+        if bus.users == 0: bus.close()
+
+    @contextmanager
+    def _using(self):
+        with self.lock:
+            self._refresh()
+            bus = self.bus
+            if bus: bus.users += 1
+        try:
+            yield bus
+        finally:
+            if bus:
+                with self.lock:
+                    bus.users -= 1
+                    if bus.retired and bus.users == 0: bus.close()
+
+    @property
+    def generation(self):
+        with self._using() as bus:
+            return bus.generation if bus else 0
+
+    def read(self):
+        with self._using() as bus:
+            if bus: return bus.read()
+        return np.zeros((self.resolution[1], self.resolution[0], 3), dtype=np.uint8)
+
+    def read_jpeg(self):
+        with self._using() as bus:
+            return bus.read_jpeg() if bus else (0, None)
+
+    def read_state(self):
+        with self._using() as bus:
+            return bus.read_state() if bus else None
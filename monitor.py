@@ -0,0 +1,97 @@
+import cv2, threading, time, base64, numpy as np
+from config import *
+from inference import TFLiteEquipmentClassifier
+from prefilter import HeatTintPrefilter
+from ratecontrol import InferenceRateController
+from sensors import SensorCollector
+
+def load_classifier():
+    try:
+        return TFLiteEquipmentClassifier(TFLITE_MODEL_PATH, LABELS_PATH)
+    except:
+        class Dummy:
+            def predict(self, f): return "NORMAL", {"normal": 1.0}
+        return Dummy()
+
+def start_sensors():
+    if not ESP_DEVICES: return None
+    return SensorCollector(ESP_DEVICES, SENSOR_POLL_SEC, SENSOR_TIMEOUT_SEC,
+                           SENSOR_JITTER, SENSOR_BACKOFF_MAX_SEC).start()
+
+def load_prefilter():
+    return HeatTintPrefilter(PREFILTER_THRESHOLD) if PREFILTER_ENABLED else None
+
+class FaultMonitor:
+    """Runs the classifier over camera frames and keeps the dashboard state
+    (prediction, fault capture, hysteresis, latest ESP readings). `on_update`
+    receives a snapshot of the state after every inference, e.g. to publish it
+    on the frame bus.
+
+    The CNN runs at the rate chosen by `rate` (an InferenceRateController).
+    With a `prefilter`, every tick also runs the cheap colour check; a flagged
+    frame raises the rate to the controller's ceiling, so it goes to the CNN as
+    soon as that rate allows."""
+    def __init__(self, camera, classifier, on_update=None, sensors=None, prefilter=None, rate=None):
+        self.camera, self.classifier, self.on_update = camera, classifier, on_update
+        self.sensors, self.prefilter = sensors, prefilter
+        self.rate = rate or InferenceRateController(INFERENCE_MIN_FPS, INFERENCE_FPS, RATE_RISE_THRESHOLD,
+                                                    max_cpu_temp=RATE_MAX_CPU_TEMP, max_load=RATE_MAX_LOAD)
+        self.state = {
+            'pred': {'label': 'INITIALIZING', 'conf': 0, 'is_fault': False},
+            'cap': None,
+            'hysteresis_end': 0
+        }
+        self.lock = threading.Lock()
+        self.stopped = False
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.stopped = True
+
+    def snapshot(self):
+        with self.lock: state = dict(self.state)
+        if self.sensors: state['sensors'] = self.sensors.snapshot()
+        return state
+
+    def step(self, frame, flagged=False):
+        t0 = time.time()
+        label, probs = self.classifier.predict(frame)
+        latency = time.time() - t0
+        with self.lock:
+            now = time.time()
+            conf = round(probs.get(label, 0)*100, 1)
+            if label.lower() != 'normal':
+                self.state['hysteresis_end'] = now + 4.0
+                self.state['pred'] = {'label': label.upper(), 'conf': conf, 'is_fault': True}
+                _, buf = cv2.imencode('.jpg', frame)
+                self.state['cap'] = base64.b64encode(buf).decode('utf-8')
+            elif now >= self.state['hysteresis_end']:
+                self.state['pred'] = {'label': 'NORMAL', 'conf': round(probs.get('normal',0)*100, 1), 'is_fault': False}
+            self.rate.update(probs, self.state['pred']['is_fault'], flagged, latency)
+            self.state['rate'] = self.rate.status()
+        if self.on_update: self.on_update(self.snapshot())
+
+    def run(self):
+        last_cnn = 0
+        while not self.stopped:
+            frame = self.camera.read()
+            if frame is not None and not np.all(frame == 0):
+                flag = False
+                if self.prefilter:
+                    flag, score = self.prefilter.check(frame)
+                    with self.lock:
+                        self.state['prefilter'] = {'score': round(score, 3), 'flag': flag}
+                        # A flag raises the rate to the controller's ceiling; it
+                        # never bypasses the ceiling or the CPU back-off
+                        if flag:
+                            self.rate.flag()
+                            self.state['rate'] = self.rate.status()
+                if time.time() - last_cnn >= self.rate.interval:
+                    last_cnn = time.time()
+                    self.step(frame, flag)
+            wait = last_cnn + self.rate.interval - time.time()
+            if self.prefilter: wait = min(wait, 1 / PREFILTER_FPS)
+            time.sleep(max(wait, 0.05))
@@ -0,0 +1,183 @@
+import argparse, random, time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+
+class HeatTintPrefilter:
+    """Cheap colour check for overheating, run ahead of the CNN.
+
+    Overheated steel shows a heat tint: straw/bronze and blue/violet bands
+    right next to each other on an otherwise grey surface. The frame is
+    downsampled to `size`x`size`, split into `cell`x`cell` blocks, and the
+    score is the fraction of blocks that contain both warm and cool tinted
+    pixels at metallic (low-to-moderate) saturation. Solid painted parts are
+    too saturated to count, and plain metal has neither band.
+    """
+    def __init__(self, threshold=0.23, size=96, cell=8, min_frac=0.05):
+        assert size % cell == 0
+        self.threshold, self.size, self.cell, self.min_frac = threshold, size, cell, min_frac
+
+    def score(self, frame):
+        small = cv2.resize(frame, (self.size, self.size), interpolation=cv2.INTER_LINEAR)
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+        h, s, v = hsv[..., 0], hsv[..., 1], hsv[..., 2]
+        metal = (s >= 25) & (s <= 150) & (v > 50)
+        warm = metal & (h <= 30)
+        cool = metal & (h >= 95) & (h <= 150)
+        n = self.size // self.cell
+        warm = warm.reshape(n, self.cell, n, self.cell).mean(axis=(1, 3))
+        cool = cool.reshape(n, self.cell, n, self.cell).mean(axis=(1, 3))
+        return float(((warm > self.min_frac) & (cool > self.min_frac)).mean())
+
+    def check(self, frame):
+        score = self.score(frame)
+        return score >= self.threshold, score
+
+
+def pick_threshold(neg, margin):
+    return round(max(neg, default=0.0) + margin, 3)
+
+
+def calibrate(data_dir, target='overheating', margin=0.03):
+    """Score every image under `data_dir/<class>/` and pick the threshold
+    `margin` above the highest non-`target` score. Reports in-sample
+    hits/false positives for that threshold, plus leave-one-out estimates
+    where each image is judged by a threshold picked without it."""
+    pf = HeatTintPrefilter()
+    scores, timings = [], []
+    for cls_dir in sorted(d for d in Path(data_dir).iterdir() if d.is_dir()):
+        for p in sorted(cls_dir.rglob('*')):
+            if p.suffix.lower() not in {'.jpg', '.jpeg', '.png'}:
+                continue
+            img = cv2.imread(str(p))
+            if img is None:
+                print(f"Skip {p}")
+                continue
+            frame = cv2.resize(img, (640, 480))  # what the camera delivers
+            t0 = time.perf_counter()
+            s = pf.score(frame)
+            timings.append(time.perf_counter() - t0)
+            scores.append((cls_dir.name, p.name, s))
+            print(f"{cls_dir.name:24s} {s:.3f}  {p.name}")
+
+    neg = [s for c, _, s in scores if c != target]
+    pos = [s for c, _, s in scores if c == target]
+    threshold = pick_threshold(neg, margin)
+    hits = sum(s >= threshold for s in pos)
+    false_pos = sum(s >= threshold for s in neg)
+
+    loo_hits = loo_fp = 0
+    for i, (c, _, s) in enumerate(scores):
+        rest = [x for j, (cj, _, x) in enumerate(scores) if j != i and cj != target]
+        flagged = s >= pick_threshold(rest, margin)
+        if c == target: loo_hits += flagged
+        else: loo_fp += flagged
+
+    print(f"\nSuggested PREFILTER_THRESHOLD = {threshold} "
+          f"({threshold - max(neg, default=0.0):.3f} above the highest non-{target} score)")
+    print(f"In-sample:     {target}: {hits}/{len(pos)} flagged | others: {false_pos}/{len(neg)} flagged")
+    print(f"Leave-one-out: {target}: {loo_hits}/{len(pos)} flagged | others: {loo_fp}/{len(neg)} flagged")
+    if len(pos) < 20 or len(neg) < 100:
+        print("Note: too few images for these rates to predict live false positives; "
+              "check /api/sync prefilter scores on real footage before relying on it.")
+    print(f"Mean score time: {1000 * np.mean(timings):.3f} ms/frame (640x480)")
+    return threshold
+
+
+def load_images(data_dir, cls, limit=None):
+    paths = sorted(p for p in (Path(data_dir) / cls).rglob('*') if p.suffix.lower() in {'.jpg', '.jpeg', '.png'})
+    imgs = [cv2.imread(str(p)) for p in paths[:limit]]
+    return [cv2.resize(i, (640, 480)) for i in imgs if i is not None]
+
+
+class ReplayCamera:
+    """Serves `normal` frames until `switch_at`, then `fault` frames."""
+    def __init__(self, normal, fault, switch_at, period=0.2):
+        self.normal, self.fault, self.switch_at, self.period = normal, fault, switch_at, period
+
+    def read(self):
+        now = time.time()
+        frames = self.fault if now >= self.switch_at else self.normal
+        return frames[int(now / self.period) % len(frames)]
+
+
+class OracleClassifier:
+    """Stand-in CNN that is always right and costs `cost` seconds per call, so
+    the replay measures scheduling, not model accuracy."""
+    def __init__(self, fault_frames, label, cost):
+        self.fault_ids, self.label, self.cost, self.calls = {id(f) for f in fault_frames}, label, cost, []
+
+    def predict(self, frame):
+        self.calls.append(time.time())
+        time.sleep(self.cost)
+        if id(frame) in self.fault_ids: return self.label, {'normal': 0.05, self.label: 0.95}
+        return 'normal', {'normal': 0.99, self.label: 0.01}
+
+
+def replay(data_dir, target='overheating', threshold=0.23, normal_sec=8.0, fault_sec=3.0, cnn_ms=80.0):
+    """Replay each `target` image after `normal_sec` of normal footage through a
+    FaultMonitor, with and without the pre-filter, and report time-to-alert
+    and CNN load. The CNN is an oracle with a fixed cost, so differences come
+    from scheduling alone. The controller starts at its normal-state floor and
+    the fault appears at a random phase of the CNN cadence. Runs in real time
+    (about 3 x images x (normal_sec + fault_sec) seconds)."""
+    from monitor import FaultMonitor
+    from ratecontrol import InferenceRateController
+    from config import INFERENCE_MIN_FPS, INFERENCE_FPS, PREFILTER_FPS
+
+    normal = load_images(data_dir, 'normal')
+    faults = load_images(data_dir, target)
+    score_s = np.mean([timed(HeatTintPrefilter(threshold).score, f) for f in normal + faults])
+    modes = [('CNN only', None, INFERENCE_MIN_FPS),
+             ('pre-filter', threshold, INFERENCE_MIN_FPS),
+             ('pre-filter, min fps / 2', threshold, INFERENCE_MIN_FPS / 2)]
+    print(f"\nReplay: {normal_sec:.0f}s normal then {fault_sec:.0f}s {target}, "
+          f"oracle CNN {cnn_ms:.0f} ms/call, pre-filter {1000 * score_s:.2f} ms/frame")
+    rng = random.Random(0)
+    for name, thr, min_fps in modes:
+        delays, normal_rate, cpu = [], [], []
+        for fault in faults:
+            start = time.time()
+            cam = ReplayCamera(normal, [fault], start + normal_sec + rng.uniform(0, 1 / min_fps))
+            clf = OracleClassifier([fault], target, cnn_ms / 1000)
+            rate = InferenceRateController(min_fps, INFERENCE_FPS)
+            rate.fps = min_fps
+            mon = FaultMonitor(cam, clf, prefilter=HeatTintPrefilter(thr) if thr else None, rate=rate).start()
+            alert = None
+            while time.time() < cam.switch_at + fault_sec:
+                if alert is None and mon.snapshot()['pred']['is_fault']: alert = time.time() - cam.switch_at
+                time.sleep(0.01)
+            mon.stop()
+            delays.append(alert)
+            calls = sum(t < cam.switch_at for t in clf.calls)
+            normal_rate.append(calls / (cam.switch_at - start))
+            ticks = PREFILTER_FPS if thr else 0
+            cpu.append(normal_rate[-1] * cnn_ms + ticks * 1000 * score_s)
+        shown = ', '.join('missed' if d is None else f"{d:.2f}s" for d in delays)
+        print(f"{name:24s} time-to-alert: {shown} | CNN calls/s while normal: {np.mean(normal_rate):.2f} "
+              f"| est. CPU while normal: {np.mean(cpu):.0f} ms/s")
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate the heat-tint pre-filter on a dataset")
+    parser.add_argument('--data', default='dataset', help='Dataset root with one folder per class')
+    parser.add_argument('--target', default='overheating', help='Class the pre-filter should flag')
+    parser.add_argument('--replay', action='store_true',
+                        help='Also replay the dataset through FaultMonitor to measure time-to-alert and CNN load')
+    parser.add_argument('--cnn_ms', type=float, default=80.0, help='Simulated CNN cost per call for --replay')
+    args = parser.parse_args()
+    threshold = calibrate(args.data, args.target)
+    if args.replay:
+        replay(args.data, args.target, threshold, cnn_ms=args.cnn_ms)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+import os, time
+from collections import deque
+
+def read_cpu_temp(path="/sys/class/thermal/thermal_zone0/temp"):
+    try:
+        with open(path) as f: return int(f.read().strip()) / 1000.0
+    except (OSError, ValueError):
+        return None
+
+_cpu_sample = None  # (time, busy jiffies, total jiffies) from the previous call
+
+def read_cpu_load(path="/proc/stat", min_window=0.2):
+    """Fraction of all CPU time spent busy since the previous call (0-1), from
+    /proc/stat deltas, so it follows the controller's own cadence. I/O wait
+    counts as idle. Returns the previous value if called again within
+    `min_window` seconds, and None where /proc/stat is unavailable."""
+    global _cpu_sample
+    try:
+        with open(path) as f: fields = [int(x) for x in f.readline().split()[1:]]
+    except (OSError, ValueError):
+        return None
+    total, idle = sum(fields[:8]), fields[3] + fields[4]  # idle + iowait; guest is in user
+    now, prev = time.time(), _cpu_sample
+    if prev and now - prev[0] < min_window: return prev[3]
+    load = None
+    if prev and total > prev[2]: load = ((total - idle) - prev[1]) / (total - prev[2])
+    _cpu_sample = (now, total - idle, total, load)
+    return load
+
+class InferenceRateController:
+    """Chooses how many CNN inferences per second the monitor runs.
+
+    Decays towards `min_fps` while the model is confidently normal, ramps
+    towards the ceiling when the defect probability rises (or the pre-filter
+    flags a frame) and sits at the ceiling while a fault is active. The
+    ceiling is `max_fps`, limited to what the measured inference latency can
+    sustain on `cpu_share` of one core, and halved when the CPU is hot or
+    busy (e.g. with MJPEG stream encoding) so inference doesn't starve it.
+    The CNN's own share is taken out of the CPU load, so running at the
+    ceiling cannot by itself trigger the back-off.
+    """
+    def __init__(self, min_fps=0.5, max_fps=4.0, rise_threshold=0.15, ramp_up=2.0, decay=0.8,
+                 max_cpu_temp=75.0, max_load=0.85, cpu_share=0.5):
+        self.min_fps, self.max_fps = min_fps, max_fps
+        self.rise_threshold, self.ramp_up, self.decay = rise_threshold, ramp_up, decay
+        self.max_cpu_temp, self.max_load, self.cpu_share = max_cpu_temp, max_load, cpu_share
+        self.fps, self.reason = max_fps, 'startup'
+        self.defect, self.latency, self.cpu_temp, self.load, self.throttled = 0.0, None, None, None, None
+        self.decisions = deque(maxlen=10)
+        self.runs = deque(maxlen=20)  # timestamps of CNN runs, for the achieved rate
+
+    @property
+    def interval(self):
+        return 1.0 / self.fps
+
+    def ceiling(self):
+        ceiling = self.max_fps
+        if self.latency: ceiling = min(ceiling, self.cpu_share / self.latency)
+        self.cpu_temp, self.load = read_cpu_temp(), read_cpu_load()
+        if self.load is not None and self.latency:
+            own = self.fps * self.latency / (os.cpu_count() or 1)
+            self.load = max(0.0, self.load - own)
+        self.throttled = None
+        if self.cpu_temp is not None and self.cpu_temp >= self.max_cpu_temp:
+            self.throttled = 'cpu temperature'
+        elif self.load is not None and self.load >= self.max_load:
+            self.throttled = 'cpu load'
+        if self.throttled: ceiling /= 2
+        return max(self.min_fps, ceiling)
+
+    def flag(self):
+        """Pre-filter flagged a frame: jump to the ceiling before the next CNN run."""
+        return self._decide(self.ceiling(), 'pre-filter flag')
+
+    def update(self, probs, is_fault=False, flagged=False, latency=None):
+        """Called after every CNN run with its probabilities."""
+        self.runs.append(time.time())
+        if latency: self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+        ceiling = self.ceiling()
+        if 'normal' not in probs:
+            # predict() failed (e.g. ("error", {})): no evidence either way
+            return self._decide(self.fps, 'no prediction')
+        defect, prev = 1.0 - probs['normal'], self.defect
+        self.defect = defect
+
+        if is_fault:
+            fps, reason = ceiling, 'fault active'
+        elif flagged:
+            fps, reason = ceiling, 'pre-filter flag'
+        elif defect >= self.rise_threshold or defect - prev >= self.rise_threshold / 2:
+            fps, reason = self.fps * self.ramp_up, 'defect probability rising'
+        else:
+            fps, reason = self.fps * self.decay, 'confidently normal'
+        return self._decide(fps, reason, ceiling)
+
+    def _decide(self, fps, reason, ceiling=None):
+        if ceiling is None: ceiling = self.ceiling()
+        if self.throttled: reason += f" (throttled: {self.throttled})"
+        self.fps = round(min(ceiling, max(self.min_fps, fps)), 2)
+        if reason != self.reason:
+            self.decisions.append({'t': round(time.time(), 1), 'fps': self.fps, 'reason': reason})
+        self.reason = reason
+        return self.fps
+
+    def achieved_fps(self):
+        if len(self.runs) < 2: return None
+        return round((len(self.runs) - 1) / (self.runs[-1] - self.runs[0]), 2)
+
+    def status(self):
+        return {
+            'fps': self.fps,
+            'achieved_fps': self.achieved_fps(),
+            'reason': self.reason,
+            'defect_prob': round(self.defect, 3),
+            'latency_ms': round(self.latency * 1000, 1) if self.latency else None,
+            'cpu_temp': self.cpu_temp,
+            'load': round(self.load, 2) if self.load is not None else None,
+            'decisions': list(self.decisions)
+        }
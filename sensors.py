@@ -0,0 +1,75 @@
+import random, threading, time, requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+class SensorCollector:
+    """Polls the `/status` endpoint of a set of ESP devices in the background.
+
+    All devices share one keep-alive `requests.Session`; each cycle the devices
+    that are due are fetched concurrently. Every request has a timeout, cycles
+    are jittered so several Pis don't hammer an ESP in lockstep, and a failing
+    device is retried with exponential backoff instead of every cycle.
+    """
+    def __init__(self, devices, interval=2.0, timeout=1.5, jitter=0.2, backoff_max=30.0):
+        self.devices = dict(devices)
+        self.interval, self.timeout, self.jitter, self.backoff_max = interval, timeout, jitter, backoff_max
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max(1, len(self.devices)), pool_maxsize=2, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.pool = ThreadPoolExecutor(max_workers=max(1, min(8, len(self.devices))))
+        self.readings = {name: {'ok': False, 'data': {}, 'ts': 0, 'error': None, 'failures': 0} for name in self.devices}
+        self._due = {name: 0 for name in self.devices}
+        self.lock = threading.Lock()
+        self.stopped = False
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.stopped = True
+
+    def _fetch(self, name):
+        try:
+            r = self.session.get(f"{self.devices[name].rstrip('/')}/status", timeout=self.timeout)
+            r.raise_for_status()
+            return name, r.json(), None
+        except (requests.RequestException, ValueError) as e:
+            return name, None, f"{type(e).__name__}: {e}"
+
+    def poll_once(self):
+        now = time.time()
+        due = [n for n, t in self._due.items() if t <= now]
+        for name, data, error in self.pool.map(self._fetch, due):
+            with self.lock:
+                rd = self.readings[name]
+                if error is None:
+                    rd.update(ok=True, data=data, ts=time.time(), error=None, failures=0)
+                    self._due[name] = now + self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+                else:
+                    rd.update(ok=False, error=error, failures=rd['failures'] + 1)
+                    delay = min(self.backoff_max, self.interval * 2 ** rd['failures'])
+                    self._due[name] = time.time() + delay * random.uniform(0.5, 1.0)
+        return due
+
+    def run(self):
+        while not self.stopped:
+            self.poll_once()
+            # Wake when the next device is due; the jitter lives in the due times
+            next_due = min(self._due.values(), default=time.time() + self.interval)
+            time.sleep(max(0.01, next_due - time.time()))
+
+    def snapshot(self):
+        with self.lock:
+            return {n: dict(rd, age=round(time.time() - rd['ts'], 1) if rd['ts'] else None)
+                    for n, rd in self.readings.items()}
+
+def latest(readings, key, max_age=None):
+    """Most recent value of `key` in a `SensorCollector.snapshot()`, or None."""
+    best = None
+    for rd in (readings or {}).values():
+        if not rd['ts'] or key not in rd['data']: continue
+        if max_age is not None and time.time() - rd['ts'] > max_age: continue
+        if best is None or rd['ts'] > best[0]: best = (rd['ts'], rd['data'][key])
+    return best[1] if best else None
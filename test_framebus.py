@@ -0,0 +1,89 @@
+import threading, time, uuid
+
+import cv2
+import numpy as np
+import pytest
+
+from framebus import FrameBus, FrameBusReader
+
+RES = (64, 48)
+
+
+@pytest.fixture
+def bus():
+    b = FrameBus.create(f"eg_test_{uuid.uuid4().hex[:8]}", RES, 1 << 16, 1 << 16)
+    yield b
+    b.close()
+
+
+def publish_frame(bus, value):
+    frame = np.full((RES[1], RES[0], 3), value, np.uint8)
+    _, jpg = cv2.imencode('.jpg', frame)
+    bus.publish_video(frame, jpg)
+    return frame, jpg
+
+
+def test_round_trip_through_reader(bus):
+    reader = FrameBusReader(bus.shm.name, RES)
+    assert reader.read_state() is None
+    assert reader.read_jpeg() == (0, None)
+    assert not reader.read().any()
+
+    frame, jpg = publish_frame(bus, 7)
+    bus.publish_state({'pred': {'label': 'NORMAL', 'conf': 99.0, 'is_fault': False}})
+    assert np.array_equal(reader.read(), frame)
+    seq, data = reader.read_jpeg()
+    assert seq == reader.generation == 2 and data == jpg.tobytes()
+    assert reader.read_state()['pred']['label'] == 'NORMAL'
+
+    publish_frame(bus, 9)
+    assert reader.generation == 4 and reader.read()[0, 0, 0] == 9
+
+
+def test_reader_retries_while_write_in_progress(bus):
+    publish_frame(bus, 7)
+    seq = bus._begin(bus.video_off)  # writer mid-update: odd sequence
+    assert bus._read(bus.video_off, lambda n: None, retries=3) is None
+    bus._end(bus.video_off, seq, 0)
+    assert bus._read(bus.video_off, lambda n: 'ok')[2] == 'ok'
+
+
+def test_refuses_takeover_of_live_bus(bus):
+    # Freshly created and not yet published to: still counts as live
+    with pytest.raises(RuntimeError):
+        FrameBus.create(bus.shm.name, RES, 1 << 16, 1 << 16)
+    bus.publish_state({'x': 1})
+    reader = FrameBusReader(bus.shm.name, RES)
+    assert reader.read_state() == {'x': 1}
+
+
+def test_reclaims_stale_bus():
+    name = f"eg_test_{uuid.uuid4().hex[:8]}"
+    old = FrameBus.create(name, RES, 1 << 16, 1 << 16, stale_sec=0.05)
+    time.sleep(0.1)
+    new = FrameBus.create(name, RES, 1 << 16, 1 << 16, stale_sec=0.05)
+    new.publish_state({'owner': 'new'})
+    assert FrameBusReader(name, RES).read_state() == {'owner': 'new'}
+    old.shm.close()
+    new.close()
+
+
+def test_stale_reattach_waits_for_in_flight_reads(bus):
+    reader = FrameBusReader(bus.shm.name, RES, retry_sec=0.0, stale_sec=0.02)
+    errors, stop = [], threading.Event()
+
+    def read_loop():
+        while not stop.is_set():
+            try:
+                reader.read(); reader.read_jpeg(); reader.read_state(); reader.generation
+            except Exception as e:
+                errors.append(repr(e))
+
+    threads = [threading.Thread(target=read_loop) for _ in range(4)]
+    for t in threads: t.start()
+    for i in range(30):
+        publish_frame(bus, i)
+        time.sleep(0.03 * (i % 3))  # alternate fresh and stale
+    stop.set()
+    for t in threads: t.join()
+    assert errors == []
@@ -0,0 +1,100 @@
+import pytest
+
+import ratecontrol
+from ratecontrol import InferenceRateController
+
+NORMAL = {'normal': 0.99, 'overheating': 0.01}
+
+
+@pytest.fixture
+def cpu(monkeypatch):
+    """Controllable CPU readings: cool and idle unless a test changes them."""
+    readings = {'temp': 50.0, 'load': 0.1}
+    monkeypatch.setattr(ratecontrol, 'read_cpu_temp', lambda: readings['temp'])
+    monkeypatch.setattr(ratecontrol, 'read_cpu_load', lambda: readings['load'])
+    return readings
+
+
+def controller(**kw):
+    return InferenceRateController(min_fps=0.5, max_fps=4.0, rise_threshold=0.15, **kw)
+
+
+def test_decays_to_min_while_normal(cpu):
+    rc = controller()
+    for _ in range(30):
+        rc.update(NORMAL)
+    assert rc.fps == 0.5 and rc.reason == 'confidently normal'
+
+
+def test_ramps_up_on_rising_defect_probability(cpu):
+    rc = controller()
+    rc.fps = 0.5
+    rc.update({'normal': 0.7, 'overheating': 0.3})
+    assert rc.fps == 1.0 and rc.reason == 'defect probability rising'
+    rc.update({'normal': 0.7, 'overheating': 0.3})
+    assert rc.fps == 2.0
+
+
+def test_ceiling_while_fault_active(cpu):
+    rc = controller()
+    rc.fps = 0.5
+    rc.update({'normal': 0.1, 'overheating': 0.9}, is_fault=True)
+    assert rc.fps == 4.0 and rc.reason == 'fault active'
+
+
+def test_throttled_halves_ceiling(cpu):
+    rc = controller()
+    cpu['temp'] = 80.0
+    rc.update({'normal': 0.1}, is_fault=True)
+    assert rc.fps == 2.0 and rc.reason == 'fault active (throttled: cpu temperature)'
+    cpu['temp'], cpu['load'] = 50.0, 0.95
+    rc.update({'normal': 0.1}, is_fault=True)
+    assert rc.fps == 2.0 and rc.reason == 'fault active (throttled: cpu load)'
+
+
+def test_throttle_jitter_does_not_flood_decisions(cpu):
+    rc = controller()
+    for load in (0.9, 0.91, 0.93, 0.97, 0.92):
+        cpu['load'] = load
+        rc.update({'normal': 0.1}, is_fault=True)
+    assert len(rc.decisions) == 1
+
+
+def test_latency_caps_ceiling(cpu):
+    rc = controller(cpu_share=0.5)
+    rc.update({'normal': 0.1}, is_fault=True, latency=0.5)  # sustainable: 0.5 / 0.5 s = 1 fps
+    assert rc.fps == 1.0
+
+
+def test_cnn_own_share_is_not_counted_as_load(cpu, monkeypatch):
+    monkeypatch.setattr(ratecontrol.os, 'cpu_count', lambda: 1)
+    rc = controller(cpu_share=0.5, max_load=0.85)
+    rc.update({'normal': 0.1}, is_fault=True, latency=0.1)
+    cpu['load'] = 0.9  # 4 fps x 0.1 s = 0.4 of the CPU is the CNN itself
+    rc.update({'normal': 0.1}, is_fault=True)
+    assert rc.load == pytest.approx(0.5) and rc.fps == 4.0
+
+
+def test_flag_jumps_to_ceiling(cpu):
+    rc = controller()
+    rc.fps = 0.5
+    assert rc.flag() == 4.0 and rc.reason == 'pre-filter flag'
+    cpu['load'] = 0.95
+    assert rc.flag() == 2.0
+
+
+def test_missing_normal_holds_rate(cpu):
+    rc = controller()
+    rc.fps, rc.defect = 1.0, 0.02
+    assert rc.update({}) == 1.0
+    assert rc.reason == 'no prediction' and rc.defect == 0.02
+
+
+def test_read_cpu_load_from_proc_stat(tmp_path, monkeypatch):
+    stat = tmp_path / 'stat'
+    monkeypatch.setattr(ratecontrol, '_cpu_sample', None)
+    # user nice system idle iowait irq softirq steal
+    stat.write_text('cpu  100 0 100 700 100 0 0 0 0 0\n')
+    assert ratecontrol.read_cpu_load(str(stat), min_window=0) is None
+    stat.write_text('cpu  175 0 125 750 150 0 0 0 0 0\n')  # +100 busy, +100 idle/iowait
+    assert ratecontrol.read_cpu_load(str(stat), min_window=0) == pytest.approx(0.5)
@@ -0,0 +1,80 @@
+import json, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from sensors import SensorCollector, latest
+
+
+class StubESP(BaseHTTPRequestHandler):
+    """Stands in for esp_endpoints_example.ino's GET /status."""
+    protocol_version = 'HTTP/1.1'
+    delay = 0
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        body = json.dumps({'water_level': 100, 'temperature': 41.5, 'load': 70}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def esp():
+    srv = ThreadingHTTPServer(('127.0.0.1', 0), StubESP)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def url(srv):
+    return f"http://127.0.0.1:{srv.server_port}"
+
+
+def test_poll_success(esp):
+    c = SensorCollector({'motor1': url(esp)}, interval=1.0, timeout=1.0)
+    assert c.poll_once() == ['motor1']
+    rd = c.snapshot()['motor1']
+    assert rd['ok'] and rd['failures'] == 0 and rd['data']['temperature'] == 41.5
+    # Not due again until the next interval
+    assert c.poll_once() == []
+
+
+def test_refused_connection_backs_off():
+    c = SensorCollector({'dead': 'http://127.0.0.1:1'}, interval=1.0, timeout=0.5, backoff_max=30.0)
+    before = time.time()
+    c.poll_once()
+    rd = c.snapshot()['dead']
+    assert not rd['ok'] and rd['failures'] == 1 and rd['error'].startswith('ConnectionError')
+    # First failure waits interval * 2 (with up to 50% jitter taken off)
+    assert before + 0.9 <= c._due['dead'] <= time.time() + 2.0
+    c._due['dead'] = 0
+    c.poll_once()
+    assert c.snapshot()['dead']['failures'] == 2
+    assert c._due['dead'] >= time.time() + 1.9
+
+
+def test_timeout_counts_as_failure(esp, monkeypatch):
+    monkeypatch.setattr(StubESP, 'delay', 0.5)
+    c = SensorCollector({'slow': url(esp)}, interval=1.0, timeout=0.1)
+    c.poll_once()
+    rd = c.snapshot()['slow']
+    assert not rd['ok'] and rd['failures'] == 1 and 'Timeout' in rd['error']
+    assert c._due['slow'] > time.time() + 0.9
+
+
+def test_latest_respects_max_age(esp):
+    c = SensorCollector({'motor1': url(esp)}, interval=1.0, timeout=1.0)
+    c.poll_once()
+    readings = c.snapshot()
+    assert latest(readings, 'temperature', max_age=30) == 41.5
+    assert latest(readings, 'humidity') is None
+    readings['motor1']['ts'] -= 60
+    assert latest(readings, 'temperature', max_age=30) is None
+    assert latest(readings, 'temperature') == 41.5